@@ -1,10 +1,20 @@
 from __future__ import annotations
 
-import json
 import os
+import pickle
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any
 
+from macrocam.utils import json_dumps, json_loads
+
+_READ_FLAGS = os.O_RDONLY | getattr(os, "O_CLOEXEC", 0)
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_CLOEXEC", 0)
+
+MEMORY_CACHE_SIZE = 128
+
+_MEMORY_CACHE: OrderedDict[tuple[str, str], dict[str, Any]] = OrderedDict()
+
 
 def _cache_dir(base_dir: str | Path | None = None) -> Path:
     if base_dir is not None:
@@ -20,23 +30,94 @@ def _cache_path(image_hash: str, base_dir: str | Path | None = None) -> Path:
     return cache_root / f"{image_hash}.json"
 
 
+def _read_bytes(path: Path) -> bytes:
+    fd = os.open(path, _READ_FLAGS)
+    try:
+        size = os.fstat(fd).st_size
+        data = os.read(fd, size)
+        while len(data) < size:
+            chunk = os.read(fd, size - len(data))
+            if not chunk:
+                break
+            data += chunk
+        return data
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        fd = os.open(tmp_path, _WRITE_FLAGS, 0o644)
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(tmp_path, _WRITE_FLAGS, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, path)
+
+
+def _remember(key: tuple[str, str], payload: dict[str, Any]) -> None:
+    _MEMORY_CACHE[key] = payload
+    _MEMORY_CACHE.move_to_end(key)
+    if len(_MEMORY_CACHE) > MEMORY_CACHE_SIZE:
+        _MEMORY_CACHE.popitem(last=False)
+
+
 def get_vision_cache(image_hash: str, base_dir: str | Path | None = None) -> dict[str, Any] | None:
     path = _cache_path(image_hash, base_dir)
-    if not path.exists():
-        return None
+    key = (image_hash, str(path.parent))
+    payload = _MEMORY_CACHE.get(key)
+    if payload is not None:
+        _MEMORY_CACHE.move_to_end(key)
+        return payload
     try:
-        return json.loads(path.read_text())
-    except (OSError, json.JSONDecodeError):
+        payload = json_loads(_read_bytes(path))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
         try:
             path.unlink()
         except OSError:
             pass
         return None
+    _remember(key, payload)
+    return payload
 
 
 def set_vision_cache(image_hash: str, payload: dict[str, Any], base_dir: str | Path | None = None) -> None:
     path = _cache_path(image_hash, base_dir)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp_path = path.with_suffix(".json.tmp")
-    tmp_path.write_text(json.dumps(payload))
-    tmp_path.replace(path)
+    _write_atomic(path, json_dumps(payload))
+    _remember((image_hash, str(path.parent)), payload)
+
+
+def _index_cache_path(name: str, base_dir: str | Path | None = None) -> Path:
+    return _cache_dir(base_dir) / f"{name}.pickle"
+
+
+def get_index_cache(name: str, tag: Any, base_dir: str | Path | None = None) -> Any | None:
+    path = _index_cache_path(name, base_dir)
+    try:
+        stored_tag, payload = pickle.loads(_read_bytes(path))
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, TypeError, ValueError, pickle.UnpicklingError):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        return None
+    if stored_tag != tag:
+        return None
+    return payload
+
+
+def set_index_cache(
+    name: str, tag: Any, payload: Any, base_dir: str | Path | None = None
+) -> None:
+    data = pickle.dumps((tag, payload), protocol=pickle.HIGHEST_PROTOCOL)
+    _write_atomic(_index_cache_path(name, base_dir), data)
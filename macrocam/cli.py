@@ -1,34 +1,35 @@
 from __future__ import annotations
 
+import threading
 from pathlib import Path
+from types import MappingProxyType
 
 import typer
 from rich.console import Console
 from rich.panel import Panel
-from rich.prompt import Prompt
-from rich.table import Table
 
-from macrocam.cache import get_vision_cache, set_vision_cache
-from macrocam.nutrition import lookup_usda_food
+from macrocam.nutrition import lookup_usda_food, preload_usda_data
 from macrocam.utils import (
     SUPPORTED_IMAGE_EXTENSIONS,
     is_supported_image,
     parse_grams,
     require_existing_file,
-    sha256_file,
 )
-from macrocam.vision import analyze_image_json, normalize_candidates
 
 
 app = typer.Typer(add_completion=False, no_args_is_help=True)
 console = Console()
 
-MIME_TYPES = {
-    ".jpg": "image/jpeg",
-    ".jpeg": "image/jpeg",
-    ".png": "image/png",
-    ".webp": "image/webp",
-}
+MIME_TYPES = MappingProxyType(
+    {
+        ".jpg": "image/jpeg",
+        ".jpeg": "image/jpeg",
+        ".png": "image/png",
+        ".webp": "image/webp",
+    }
+)
+
+_SUPPORTED_EXTENSIONS_TEXT = ", ".join(sorted(SUPPORTED_IMAGE_EXTENSIONS))
 
 
 def _print_header() -> None:
@@ -41,13 +42,32 @@ def _print_header() -> None:
 
 def _get_mime_type(path: Path) -> str:
     ext = path.suffix.lower()
-    if ext not in MIME_TYPES:
-        supported = ", ".join(sorted(SUPPORTED_IMAGE_EXTENSIONS))
-        raise ValueError(f"Unsupported image extension: {ext}. Supported: {supported}")
-    return MIME_TYPES[ext]
+    mime_type = MIME_TYPES.get(ext)
+    if mime_type is None:
+        raise ValueError(
+            f"Unsupported image extension: {ext}. Supported: {_SUPPORTED_EXTENSIONS_TEXT}"
+        )
+    return mime_type
+
+
+def _start_prefetch(data_dir: Path | None) -> threading.Thread:
+    # Warm the memoized USDA loaders while the vision call and prompts run.
+    # Failures are ignored here; lookup_usda_food reports them.
+    def run() -> None:
+        try:
+            preload_usda_data(data_dir)
+        except Exception:
+            pass
+
+    thread = threading.Thread(target=run, name="macrocam-usda-prefetch", daemon=True)
+    thread.start()
+    return thread
 
 
 def _prompt_label(candidates) -> str:
+    from rich.prompt import Prompt
+    from rich.table import Table
+
     table = Table(title="Detected foods", header_style="bold magenta")
     table.add_column("#", style="cyan", justify="right")
     table.add_column("Label", style="bold")
@@ -71,6 +91,8 @@ def _prompt_label(candidates) -> str:
 
 
 def _prompt_grams() -> float:
+    from rich.prompt import Prompt
+
     while True:
         raw = Prompt.ask("Portion (grams)", default="100")
         try:
@@ -86,6 +108,8 @@ def _scale_optional(value: float | None, multiplier: float) -> float | None:
 
 
 def _render_macros(grams: float, match) -> None:
+    from rich.table import Table
+
     multiplier = grams / 100.0
     facts = match.per_100g
     calories = facts.calories_kcal * multiplier
@@ -128,6 +152,9 @@ def main(
     food: str | None = typer.Option(None, "--food", help="Food label override"),
     grams: str | None = typer.Option(None, "--grams", help="Portion size, grams"),
     data_dir: Path | None = typer.Option(None, "--data-dir", help="USDA CSV directory"),
+    no_prefetch: bool = typer.Option(
+        False, "--no-prefetch", help="Do not preload USDA data in the background"
+    ),
 ) -> None:
     _print_header()
 
@@ -139,6 +166,7 @@ def main(
         console.print(f"[red]Input error:[/red] {exc}")
         raise typer.Exit(code=1) from exc
 
+    prefetch: threading.Thread | None = None
     if no_interactive:
         if not food or not grams:
             console.print("[red]--no-interactive requires --food and --grams.[/red]")
@@ -153,22 +181,18 @@ def main(
             console.print(f"[red]Invalid --grams:[/red] {exc}")
             raise typer.Exit(code=1) from exc
     else:
+        from macrocam.vision import analyze_image_json, normalize_candidates
+
+        if not no_prefetch:
+            prefetch = _start_prefetch(data_dir)
         mime_type = _get_mime_type(image_file)
-        image_hash = sha256_file(image_file)
-
-        cached = get_vision_cache(image_hash)
-        if cached is None:
-            with image_file.open("rb") as handle:
-                image_bytes = handle.read()
-            with console.status("[bold green]Analyzing image...[/bold green]"):
-                try:
-                    raw = analyze_image_json(image_bytes=image_bytes, mime_type=mime_type)
-                except Exception as exc:  # pragma: no cover - external API
-                    console.print(f"[red]Vision API error:[/red] {exc}")
-                    raise typer.Exit(code=2) from exc
-            set_vision_cache(image_hash, raw)
-        else:
-            raw = cached
+        image_bytes = image_file.read_bytes()
+        with console.status("[bold green]Analyzing image...[/bold green]"):
+            try:
+                raw = analyze_image_json(image_bytes=image_bytes, mime_type=mime_type)
+            except Exception as exc:  # pragma: no cover - external API
+                console.print(f"[red]Vision API error:[/red] {exc}")
+                raise typer.Exit(code=2) from exc
 
         try:
             vision = normalize_candidates(raw)
@@ -180,6 +204,8 @@ def main(
         grams_value = _prompt_grams()
 
     with console.status("[bold green]Looking up nutrition...[/bold green]"):
+        if prefetch is not None:
+            prefetch.join()
         try:
             match = lookup_usda_food(label, data_dir=data_dir)
         except Exception as exc:
@@ -15,7 +15,7 @@ def _require_non_negative(value: float, field_name: str) -> None:
         raise ValueError(f"{field_name} must be non-negative")
 
 
-@dataclass
+@dataclass(slots=True)
 class Candidate:
     label: str
     confidence: float
@@ -27,7 +27,7 @@ class Candidate:
             raise ValueError("confidence must be between 0.0 and 1.0")
 
 
-@dataclass
+@dataclass(slots=True)
 class NutritionFacts:
     calories_kcal: float
     protein_g: float
@@ -53,7 +53,7 @@ class NutritionFacts:
             _require_non_negative(self.cholesterol_mg, "cholesterol_mg")
 
 
-@dataclass
+@dataclass(slots=True)
 class DbMatch:
     fdc_id: str
     description: str
@@ -66,7 +66,7 @@ class DbMatch:
         _require_non_empty(self.db_name, "db_name")
 
 
-@dataclass
+@dataclass(slots=True)
 class MealItem:
     label: str
     grams: float
@@ -78,7 +78,7 @@ class MealItem:
             raise ValueError("grams must be greater than 0")
 
 
-@dataclass
+@dataclass(slots=True)
 class CacheEntry:
     image_hash: str
     vision_response_json: dict[str, Any]
@@ -1,17 +1,28 @@
 from __future__ import annotations
 
+import bisect
+import contextlib
 import csv
+import functools
+import heapq
 import json
 import os
 import re
+from array import array
+from collections import defaultdict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
-
-import httpx
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, TypeVar
 
+from macrocam.cache import get_index_cache, set_index_cache
 from macrocam.models import DbMatch, NutritionFacts
-from macrocam.vision import VisionConfig, get_vision_config
+from macrocam.utils import json_loads
+
+if TYPE_CHECKING:
+    from macrocam.vision import VisionConfig
+
+
+T = TypeVar("T")
 
 
 DEFAULT_DATA_DIR = Path("data/usda_fdc")
@@ -19,6 +30,15 @@ DATA_DIR_ENV = "MACROCAM_USDA_DIR"
 
 REQUIRED_FILES = ("food.csv", "food_nutrient.csv", "nutrient.csv")
 
+CSV_BUFFER_SIZE = 4 * 1024 * 1024
+
+FOOD_NUTRIENT_INDEX_CACHE = "food_nutrient.idx"
+NUTRIENT_IDS_CACHE = "nutrient_ids"
+
+# Bump when the CSV parsing or id resolution rules change so persisted
+# indexes built by older versions are rebuilt.
+INDEX_CACHE_VERSION = 1
+
 NUTRIENT_NAME_PREFERENCES: dict[str, list[str]] = {
     "calories_kcal": [
         "Energy",
@@ -56,8 +76,14 @@ DATA_TYPE_BONUS = {
     for idx, data_type in enumerate(PREFERRED_DATA_TYPES)
 }
 
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+_AMOUNT_PATTERN = r"^[+-]?(?:(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?|inf(?:inity)?|nan)$"
+_ASCII_NON_ALNUM_TO_SPACE = str.maketrans(
+    {chr(code): " " for code in range(128) if not chr(code).isalnum()}
+)
+
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FoodCandidate:
     fdc_id: str
     description: str
@@ -65,6 +91,19 @@ class FoodCandidate:
     score: float
 
 
+@dataclass(frozen=True, slots=True)
+class FoodTable:
+    fdc_ids: tuple[str, ...]
+    descriptions: tuple[str, ...]
+    data_types: tuple[str, ...]
+    normalized_desc: tuple[str, ...]
+    desc_tokens: tuple[frozenset[str], ...]
+    row_numbers: tuple[int, ...]
+    token_rows: dict[str, array[int]]
+    joined_desc: str
+    desc_offsets: tuple[int, ...]
+
+
 def _resolve_data_dir(data_dir: str | Path | None) -> Path:
     if data_dir is None:
         override = os.environ.get(DATA_DIR_ENV)
@@ -79,8 +118,10 @@ def _resolve_data_dir(data_dir: str | Path | None) -> Path:
 
 
 def _normalize_text(text: str) -> str:
-    cleaned = re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
-    return re.sub(r"\s+", " ", cleaned)
+    lowered = text.lower()
+    if lowered.isascii():
+        return " ".join(lowered.translate(_ASCII_NON_ALNUM_TO_SPACE).split())
+    return _NON_ALNUM_RE.sub(" ", lowered).strip()
 
 
 def _extract_text_from_gemini_response(payload: dict[str, object]) -> str:
@@ -107,6 +148,9 @@ def suggest_fallback_queries(
 ) -> list[str]:
     if not query or not query.strip():
         return []
+
+    from macrocam.vision import get_http_client, get_vision_config, post_with_backoff
+
     if config is None:
         config = get_vision_config()
 
@@ -123,14 +167,13 @@ def suggest_fallback_queries(
     payload = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
     headers = {"x-goog-api-key": config.api_key}
 
-    timeout = httpx.Timeout(30.0)
-    with httpx.Client(timeout=timeout) as client:
-        response = client.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        text = _extract_text_from_gemini_response(response.json())
+    response = post_with_backoff(
+        get_http_client(), url, json=payload, headers=headers, config=config
+    )
+    text = _extract_text_from_gemini_response(json_loads(response.content))
 
     try:
-        data = json.loads(text)
+        data = json_loads(text)
     except json.JSONDecodeError:
         return []
 
@@ -150,12 +193,10 @@ def suggest_fallback_queries(
 def _score_description(
     query_norm: str,
     query_tokens: set[str],
-    description: str,
+    desc_norm: str,
+    desc_tokens: frozenset[str],
     data_type: str,
 ) -> float:
-    if not description:
-        return 0.0
-    desc_norm = _normalize_text(description)
     if not query_norm or not desc_norm:
         return 0.0
 
@@ -165,7 +206,6 @@ def _score_description(
     if query_norm in desc_norm:
         return 1.2 + bonus
 
-    desc_tokens = set(desc_norm.split())
     if not desc_tokens:
         return 0.0
     overlap = len(query_tokens.intersection(desc_tokens))
@@ -175,11 +215,127 @@ def _score_description(
     return base + bonus
 
 
-def _iter_food_rows(food_path: Path) -> Iterable[dict[str, str]]:
-    with food_path.open(newline="", encoding="utf-8") as handle:
-        reader = csv.DictReader(handle)
+def _fadvise(fd: int, advice_name: str) -> None:
+    advice = getattr(os, advice_name, None)
+    if advice is None or not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, advice)
+    except OSError:
+        pass
+
+
+@contextlib.contextmanager
+def _open_usda_csv(path: Path, *, drop_cache: bool = False) -> Iterator[Iterator[list[str]]]:
+    # The USDA files are read front to back once. Files whose parsed form is
+    # persisted in the index cache can also be dropped from the page cache.
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        _fadvise(fd, "POSIX_FADV_SEQUENTIAL")
+        with open(
+            fd,
+            newline="",
+            encoding="utf-8",
+            buffering=CSV_BUFFER_SIZE,
+            closefd=False,
+        ) as handle:
+            yield csv.reader(handle)
+        if drop_cache:
+            _fadvise(fd, "POSIX_FADV_DONTNEED")
+    finally:
+        os.close(fd)
+
+
+def _header_indexes(
+    reader: Iterator[list[str]],
+    path: Path | str,
+    *columns: str,
+) -> tuple[int, ...]:
+    header = next(reader, [])
+    try:
+        return tuple(header.index(column) for column in columns)
+    except ValueError:
+        raise ValueError(f"Malformed USDA file: {path}") from None
+
+
+def _field(row: list[str], index: int) -> str:
+    return row[index].strip() if index < len(row) else ""
+
+
+def _load_food_table(base_dir: Path) -> FoodTable:
+    food_path = base_dir / "food.csv"
+    return _load_food_table_cached(str(food_path), food_path.stat().st_mtime_ns)
+
+
+def _iter_food_rows(food_path: Path) -> Iterable[tuple[str, str, str]]:
+    with _open_usda_csv(food_path) as reader:
+        i_id, i_desc, i_dt = _header_indexes(
+            reader, food_path, "fdc_id", "description", "data_type"
+        )
         for row in reader:
-            yield row
+            yield _field(row, i_id), _field(row, i_desc), _field(row, i_dt)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_food_table_cached(path: str, mtime_ns: int) -> FoodTable:
+    rows = [
+        (row_number, fdc_id, description, data_type)
+        for row_number, (fdc_id, description, data_type) in enumerate(
+            _iter_food_rows(Path(path))
+        )
+        if fdc_id and description
+    ]
+
+    normalized = tuple(_normalize_text(row[2]) for row in rows)
+    desc_tokens = tuple(frozenset(desc.split()) for desc in normalized)
+
+    token_rows: dict[str, array[int]] = {}
+    for idx, tokens in enumerate(desc_tokens):
+        for token in tokens:
+            posting = token_rows.get(token)
+            if posting is None:
+                posting = token_rows[token] = array("I")
+            posting.append(idx)
+
+    # Normalized descriptions only contain [a-z0-9 ], so a newline-joined
+    # copy lets str.find locate substring matches without crossing rows.
+    desc_offsets: list[int] = []
+    offset = 0
+    for desc in normalized:
+        desc_offsets.append(offset)
+        offset += len(desc) + 1
+
+    return FoodTable(
+        fdc_ids=tuple(row[1] for row in rows),
+        descriptions=tuple(row[2] for row in rows),
+        data_types=tuple(row[3] for row in rows),
+        normalized_desc=normalized,
+        desc_tokens=desc_tokens,
+        row_numbers=tuple(row[0] for row in rows),
+        token_rows=token_rows,
+        joined_desc="\n".join(normalized),
+        desc_offsets=tuple(desc_offsets),
+    )
+
+
+def _candidate_rows(table: FoodTable, query_norm: str, query_tokens: set[str]) -> list[int]:
+    # Only rows sharing a token with the query, or containing it as a
+    # substring, can score above zero in _score_description.
+    rows: set[int] = set()
+    for token in query_tokens:
+        posting = table.token_rows.get(token)
+        if posting is not None:
+            rows.update(posting)
+
+    offsets = table.desc_offsets
+    pos = table.joined_desc.find(query_norm)
+    while pos != -1:
+        row = bisect.bisect_right(offsets, pos) - 1
+        rows.add(row)
+        if row + 1 >= len(offsets):
+            break
+        pos = table.joined_desc.find(query_norm, offsets[row + 1])
+    return sorted(rows)
 
 
 def search_usda_foods(
@@ -190,79 +346,122 @@ def search_usda_foods(
     prefer_types: Iterable[str] | None = None,
     max_rows: int | None = None,
 ) -> list[FoodCandidate]:
-    if not query or not query.strip():
+    if not query or not _normalize_text(query):
         raise ValueError("query must be non-empty")
+    return search_usda_foods_multi(
+        [query], data_dir, limit=limit, prefer_types=prefer_types, max_rows=max_rows
+    )
 
-    base_dir = _resolve_data_dir(data_dir)
-    food_path = base_dir / "food.csv"
-    prefer = set(prefer_types) if prefer_types is not None else set(PREFERRED_DATA_TYPES)
 
-    query_norm = _normalize_text(query)
-    if not query_norm:
-        raise ValueError("query must be non-empty")
-    query_tokens = set(query_norm.split())
+def search_usda_foods_multi(
+    queries: Iterable[str],
+    data_dir: str | Path | None = None,
+    *,
+    limit: int = 5,
+    prefer_types: Iterable[str] | None = None,
+    max_rows: int | None = None,
+) -> list[FoodCandidate]:
+    normalized: list[tuple[str, set[str]]] = []
+    for query in queries:
+        query_norm = _normalize_text(query or "")
+        if query_norm:
+            normalized.append((query_norm, set(query_norm.split())))
 
-    candidates: list[FoodCandidate] = []
-    for idx, row in enumerate(_iter_food_rows(food_path)):
-        if max_rows is not None and idx >= max_rows:
-            break
-        description = (row.get("description") or "").strip()
-        if not description:
-            continue
-        data_type = (row.get("data_type") or "").strip()
-        if prefer and data_type and data_type not in prefer:
-            continue
-        score = _score_description(query_norm, query_tokens, description, data_type)
-        if score <= 0:
-            continue
-        fdc_id = str(row.get("fdc_id") or "").strip()
-        if not fdc_id:
-            continue
+    base_dir = _resolve_data_dir(data_dir)
+    table = _load_food_table(base_dir)
+    prefer = set(prefer_types) if prefer_types is not None else set(PREFERRED_DATA_TYPES)
 
-        candidate = FoodCandidate(
-            fdc_id=fdc_id,
-            description=description,
-            data_type=data_type,
+    # One min-heap of (score, -row) per query. The lowest score is evicted
+    # first and, among equal scores, the latest row, so ties are broken
+    # deterministically in favour of earlier rows.
+    heaps: list[list[tuple[float, int]]] = [[] for _ in normalized]
+    if limit > 0:
+        for heap, (query_norm, query_tokens) in zip(heaps, normalized):
+            for idx in _candidate_rows(table, query_norm, query_tokens):
+                if max_rows is not None and table.row_numbers[idx] >= max_rows:
+                    break
+                data_type = table.data_types[idx]
+                if prefer and data_type and data_type not in prefer:
+                    continue
+                score = _score_description(
+                    query_norm,
+                    query_tokens,
+                    table.normalized_desc[idx],
+                    table.desc_tokens[idx],
+                    data_type,
+                )
+                if score <= 0:
+                    continue
+                entry = (score, -idx)
+                if len(heap) < limit:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+
+    return [
+        FoodCandidate(
+            fdc_id=table.fdc_ids[-neg_idx],
+            description=table.descriptions[-neg_idx],
+            data_type=table.data_types[-neg_idx],
             score=score,
         )
-        if len(candidates) < limit:
-            candidates.append(candidate)
-        else:
-            lowest_index = min(
-                range(len(candidates)), key=lambda idx: candidates[idx].score
-            )
-            if candidate.score > candidates[lowest_index].score:
-                candidates[lowest_index] = candidate
-
-    candidates.sort(key=lambda candidate: candidate.score, reverse=True)
-    return candidates[:limit]
+        for heap in heaps
+        for score, neg_idx in sorted(heap, reverse=True)
+    ]
 
 
 def _load_nutrient_index(base_dir: Path) -> dict[str, dict[str, str]]:
     nutrient_path = base_dir / "nutrient.csv"
-    lookup: dict[str, dict[str, str]] = {}
-    with nutrient_path.open(newline="", encoding="utf-8") as handle:
-        reader = csv.DictReader(handle)
+    # Same-name nutrients keep the first entry seen, unless a later one is
+    # reported in KCAL and the kept one is not.
+    lookup: dict[str, tuple[int, dict[str, str]]] = {}
+    with _open_usda_csv(nutrient_path, drop_cache=True) as reader:
+        i_id, i_name, i_unit = _header_indexes(
+            reader, nutrient_path, "id", "name", "unit_name"
+        )
         for row in reader:
-            name = (row.get("name") or "").strip()
+            name = _field(row, i_name)
             if not name:
                 continue
-            entry = {
-                "id": str(row.get("id") or "").strip(),
-                "unit": (row.get("unit_name") or "").strip().upper(),
-            }
+            entry = {"id": _field(row, i_id), "unit": _field(row, i_unit).upper()}
+            priority = 1 if entry["unit"] == "KCAL" else 0
             key = name.lower()
-            if key in lookup:
-                existing = lookup[key]
-                if existing.get("unit") == "KCAL":
-                    continue
-                if entry.get("unit") != "KCAL":
-                    continue
-            lookup[key] = entry
-    return lookup
+            previous = lookup.get(key)
+            if previous is None or priority > previous[0]:
+                lookup[key] = (priority, entry)
+    return {key: entry for key, (_, entry) in lookup.items()}
+
+
+def _load_or_build_index(name: str, tag: tuple, build: Callable[[], T]) -> T:
+    cached = get_index_cache(name, tag)
+    if cached is not None:
+        return cached
+    value = build()
+    try:
+        set_index_cache(name, tag, value)
+    except OSError:
+        pass
+    return value
 
 
 def _resolve_nutrient_ids(base_dir: Path) -> dict[str, list[str]]:
+    nutrient_path = base_dir / "nutrient.csv"
+    return _resolve_nutrient_ids_cached(str(base_dir), nutrient_path.stat().st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=4)
+def _resolve_nutrient_ids_cached(base_dir: str, mtime_ns: int) -> dict[str, list[str]]:
+    preferences = tuple(
+        (field, tuple(names)) for field, names in NUTRIENT_NAME_PREFERENCES.items()
+    )
+    return _load_or_build_index(
+        NUTRIENT_IDS_CACHE,
+        (INDEX_CACHE_VERSION, str(Path(base_dir) / "nutrient.csv"), mtime_ns, preferences),
+        lambda: _build_nutrient_ids(Path(base_dir)),
+    )
+
+
+def _build_nutrient_ids(base_dir: Path) -> dict[str, list[str]]:
     nutrient_lookup = _load_nutrient_index(base_dir)
     resolved: dict[str, list[str]] = {}
     for field, names in NUTRIENT_NAME_PREFERENCES.items():
@@ -276,31 +475,127 @@ def _resolve_nutrient_ids(base_dir: Path) -> dict[str, list[str]]:
     return resolved
 
 
-def _load_nutrient_amounts(
-    fdc_id: str,
+def _load_food_nutrient_index(
     base_dir: Path,
-    required_ids: set[str],
-) -> dict[str, float]:
+    required_ids: frozenset[str],
+) -> dict[str, dict[str, float]]:
     nutrient_path = base_dir / "food_nutrient.csv"
-    amounts: dict[str, float] = {}
-    with nutrient_path.open(newline="", encoding="utf-8") as handle:
-        reader = csv.DictReader(handle)
+    return _load_food_nutrient_index_cached(
+        str(nutrient_path), nutrient_path.stat().st_mtime_ns, required_ids
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def _load_food_nutrient_index_cached(
+    path: str,
+    mtime_ns: int,
+    required_ids: frozenset[str],
+) -> dict[str, dict[str, float]]:
+    return _load_or_build_index(
+        FOOD_NUTRIENT_INDEX_CACHE,
+        (INDEX_CACHE_VERSION, path, mtime_ns, tuple(sorted(required_ids))),
+        lambda: _read_food_nutrient_index(path, required_ids),
+    )
+
+
+def _read_food_nutrient_index(
+    path: str,
+    required_ids: frozenset[str],
+) -> dict[str, dict[str, float]]:
+    index = _read_food_nutrient_index_arrow(path, required_ids)
+    if index is None:
+        index = _read_food_nutrient_index_csv(path, required_ids)
+    return index
+
+
+def _read_food_nutrient_index_arrow(
+    path: str,
+    required_ids: frozenset[str],
+) -> dict[str, dict[str, float]] | None:
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.csv as pacsv
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+
+    # Amounts are read as text and filtered like the csv reader's float()
+    # check, so one unparseable cell skips that row instead of the whole file.
+    convert_options = pacsv.ConvertOptions(
+        include_columns=["fdc_id", "nutrient_id", "amount"],
+        column_types={
+            "fdc_id": pa.string(),
+            "nutrient_id": pa.string(),
+            "amount": pa.string(),
+        },
+    )
+    wanted = pa.array(sorted(required_ids), type=pa.string())
+    index: defaultdict[str, dict[str, float]] = defaultdict(dict)
+    try:
+        with pacsv.open_csv(path, convert_options=convert_options) as reader:
+            for batch in reader:
+                nutrient_ids = pc.utf8_trim_whitespace(batch.column("nutrient_id"))
+                wanted_mask = pc.is_in(nutrient_ids, value_set=wanted)
+                nutrient_ids = pc.filter(nutrient_ids, wanted_mask)
+                amounts = pc.utf8_trim_whitespace(pc.filter(batch.column("amount"), wanted_mask))
+                fdc_ids = pc.filter(batch.column("fdc_id"), wanted_mask)
+
+                numeric_mask = pc.match_substring_regex(
+                    amounts, _AMOUNT_PATTERN, ignore_case=True
+                )
+                for fdc_id, nutrient_id, amount in zip(
+                    pc.utf8_trim_whitespace(pc.filter(fdc_ids, numeric_mask)).to_pylist(),
+                    pc.filter(nutrient_ids, numeric_mask).to_pylist(),
+                    pc.cast(pc.filter(amounts, numeric_mask), pa.float64()).to_pylist(),
+                ):
+                    index[fdc_id or ""].setdefault(nutrient_id, amount)
+    except (pa.ArrowException, KeyError):
+        return None
+    return dict(index)
+
+
+def _read_food_nutrient_index_csv(
+    path: str,
+    required_ids: frozenset[str],
+) -> dict[str, dict[str, float]]:
+    index: defaultdict[str, dict[str, float]] = defaultdict(dict)
+    with _open_usda_csv(Path(path), drop_cache=True) as reader:
+        i_id, i_nutrient, i_amount = _header_indexes(
+            reader, path, "fdc_id", "nutrient_id", "amount"
+        )
         for row in reader:
-            if str(row.get("fdc_id") or "").strip() != fdc_id:
-                continue
-            nutrient_id = str(row.get("nutrient_id") or "").strip()
+            nutrient_id = _field(row, i_nutrient)
             if nutrient_id not in required_ids:
                 continue
-            if nutrient_id in amounts:
-                continue
-            raw_amount = (row.get("amount") or "").strip()
+            raw_amount = _field(row, i_amount)
             if raw_amount == "":
                 continue
             try:
-                amounts[nutrient_id] = float(raw_amount)
+                amount = float(raw_amount)
             except ValueError:
                 continue
-    return amounts
+            index[_field(row, i_id)].setdefault(nutrient_id, amount)
+    return dict(index)
+
+
+def _load_nutrient_amounts(
+    fdc_id: str,
+    base_dir: Path,
+    required_ids: frozenset[str],
+) -> dict[str, float]:
+    index = _load_food_nutrient_index(base_dir, required_ids)
+    return index.get(fdc_id, {})
+
+
+def _required_nutrient_ids(nutrient_ids: dict[str, list[str]]) -> frozenset[str]:
+    return frozenset(nutrient_id for ids in nutrient_ids.values() for nutrient_id in ids)
+
+
+def preload_usda_data(data_dir: str | Path | None = None) -> None:
+    base_dir = _resolve_data_dir(data_dir)
+    _load_food_table(base_dir)
+    nutrient_ids = _resolve_nutrient_ids(base_dir)
+    _load_food_nutrient_index(base_dir, _required_nutrient_ids(nutrient_ids))
 
 
 def _build_nutrition_facts(
@@ -352,11 +647,9 @@ def lookup_usda_food(
     if not matches:
         if fallback_queries is None and use_llm_fallback:
             fallback_queries = suggest_fallback_queries(query)
-        for alt_query in fallback_queries or []:
-            matches.extend(
-                search_usda_foods(
-                    alt_query, base_dir, limit=20, prefer_types=prefer_types
-                )
+        if fallback_queries:
+            matches = search_usda_foods_multi(
+                fallback_queries, base_dir, limit=20, prefer_types=prefer_types
             )
     if not matches:
         raise ValueError(f"No USDA matches found for query: {query}")
@@ -369,9 +662,7 @@ def lookup_usda_food(
         unique_matches.append(candidate)
 
     nutrient_ids = _resolve_nutrient_ids(base_dir)
-    required_ids: set[str] = set()
-    for ids in nutrient_ids.values():
-        required_ids.update(ids)
+    required_ids = _required_nutrient_ids(nutrient_ids)
     last_error: Exception | None = None
     for candidate in unique_matches:
         try:
@@ -1,11 +1,46 @@
 from __future__ import annotations
 
 import hashlib
-import re
+import json
+import logging
+import os
+import stat
 from pathlib import Path
+from typing import Any
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
 
-SUPPORTED_IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+try:
+    from blake3 import blake3
+except ImportError:  # pragma: no cover - optional dependency
+    blake3 = None
+
+
+SUPPORTED_IMAGE_EXTENSIONS = frozenset({".png", ".jpg", ".jpeg", ".webp"})
+
+GRAM_UNITS = frozenset({"g", "gram", "grams"})
+
+BLAKE3_THREADED_MIN_BYTES = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+if getattr(hashlib.sha256, "__module__", "") != "_hashlib":  # pragma: no cover - build specific
+    logger.warning("hashlib.sha256 is not backed by OpenSSL; image hashing will be slow")
+
+
+def json_loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode("utf-8")
 
 
 def sha256_bytes(data: bytes) -> str:
@@ -13,27 +48,41 @@ def sha256_bytes(data: bytes) -> str:
 
 
 def sha256_file(path: str | Path) -> str:
-    file_path = Path(path)
-    hasher = hashlib.sha256()
-    with file_path.open("rb") as handle:
-        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
-            hasher.update(chunk)
-    return hasher.hexdigest()
+    with Path(path).open("rb") as handle:
+        return hashlib.file_digest(handle, "sha256").hexdigest()
+
+
+def image_bytes_cache_key(data: bytes) -> str:
+    if blake3 is None:
+        return f"sha256-{sha256_bytes(data)}"
+    # Spinning up hashing threads costs more than it saves on small inputs.
+    max_threads = blake3.AUTO if len(data) >= BLAKE3_THREADED_MIN_BYTES else 1
+    return f"blake3-{blake3(data, max_threads=max_threads).hexdigest()}"
 
 
 def is_supported_image(path: str | Path) -> bool:
-    return Path(path).suffix.lower() in SUPPORTED_IMAGE_EXTENSIONS
+    file_path = path if isinstance(path, Path) else Path(path)
+    return file_path.suffix.lower() in SUPPORTED_IMAGE_EXTENSIONS
 
 
 def require_existing_file(path: str | Path) -> Path:
     file_path = Path(path)
-    if not file_path.exists():
-        raise FileNotFoundError(f"File not found: {file_path}")
-    if not file_path.is_file():
+    try:
+        mode = os.stat(file_path).st_mode
+    except (FileNotFoundError, NotADirectoryError) as exc:
+        raise FileNotFoundError(f"File not found: {file_path}") from exc
+    if not stat.S_ISREG(mode):
         raise ValueError(f"Not a file: {file_path}")
     return file_path
 
 
+def _scan_decimal(text: str, start: int) -> int:
+    end = start
+    while end < len(text) and text[end].isdecimal():
+        end += 1
+    return end
+
+
 def parse_grams(raw: str) -> float:
     if raw is None:
         raise ValueError("grams input is required")
@@ -41,13 +90,26 @@ def parse_grams(raw: str) -> float:
     if not text:
         raise ValueError("grams input is required")
 
-    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([a-z]*)", text)
-    if not match:
+    if text.isdecimal():
+        value = float(text)
+        if value <= 0:
+            raise ValueError("grams must be greater than 0")
+        return value
+
+    end = _scan_decimal(text, 0)
+    if end == 0:
+        raise ValueError("invalid grams input")
+    if end < len(text) and text[end] == ".":
+        end = _scan_decimal(text, end + 1)
+        if not text[end - 1].isdecimal():
+            raise ValueError("invalid grams input")
+
+    unit = text[end:].lstrip()
+    if unit and not (unit.isascii() and unit.isalpha()):
         raise ValueError("invalid grams input")
 
-    value = float(match.group(1))
-    unit = match.group(2) or "g"
-    if unit not in {"g", "gram", "grams"}:
+    value = float(text[:end])
+    if (unit or "g") not in GRAM_UNITS:
         raise ValueError("unsupported unit")
     if value <= 0:
         raise ValueError("grams must be greater than 0")
@@ -1,39 +1,152 @@
 from __future__ import annotations
 
-import base64
+import asyncio
+import atexit
+import contextlib
+import functools
+import heapq
+import importlib.util
+import io
 import json
 import os
+import random
+import re
+import time
+import weakref
 from dataclasses import dataclass
-from typing import Any
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Iterator, TypeVar
 
-import httpx
-from dotenv import load_dotenv
+try:
+    from pybase64 import b64encode
+except ImportError:  # pragma: no cover - optional dependency
+    from base64 import b64encode
 
+from macrocam.cache import get_vision_cache, set_vision_cache
 from macrocam.models import Candidate
+from macrocam.utils import image_bytes_cache_key, json_dumps, json_loads
+
+if TYPE_CHECKING:
+    import httpx
+
+T = TypeVar("T")
 
 _ENV_LOADED = False
 
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504, 529})
+RETRY_JITTER = 1.0
+
+IMAGE_MAX_EDGE = 1024
+IMAGE_JPEG_QUALITY = 80
+IMAGE_RESIZE_MIN_BYTES = 256 * 1024
+
+# Bump when the prompt changes so cached vision responses are not reused.
+PROMPT_VERSION = "v1"
+
+_CACHE_KEY_UNSAFE_RE = re.compile(r"[^A-Za-z0-9._-]+")
+
+_ASYNC_CLIENTS: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+    weakref.WeakKeyDictionary()
+)
+# Open _async_client_scope count per loop, and whether the outermost scope
+# found no client already registered (and so owns the one created inside it).
+_ASYNC_SCOPES: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple[int, bool]] = (
+    weakref.WeakKeyDictionary()
+)
+
 
 def _ensure_env_loaded() -> None:
     global _ENV_LOADED
     if not _ENV_LOADED:
+        from dotenv import load_dotenv
+
         load_dotenv()
         _ENV_LOADED = True
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class VisionConfig:
     api_key: str
     model: str
     api_base: str = "https://generativelanguage.googleapis.com/v1beta"
+    max_retries: int = 5
+    retry_base: float = 1.0
+    retry_cap: float = 30.0
 
 
-@dataclass
+@dataclass(slots=True)
 class VisionResult:
     items: list[Candidate]
     overall_notes: str = ""
 
 
+@functools.lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    import httpx
+
+    client = httpx.Client(
+        http2=importlib.util.find_spec("h2") is not None,
+        timeout=httpx.Timeout(30.0),
+        limits=httpx.Limits(max_keepalive_connections=4),
+    )
+    atexit.register(client.close)
+    return client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    # Async connection pools are bound to the event loop that created them,
+    # so keep one client per running loop.
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None:
+        import httpx
+
+        client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            timeout=httpx.Timeout(30.0),
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        )
+        _ASYNC_CLIENTS[loop] = client
+    return client
+
+
+async def close_async_http_client() -> None:
+    client = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+@contextlib.asynccontextmanager
+async def _async_client_scope() -> AsyncIterator[None]:
+    # Scopes on one loop share its client: only the last scope to exit closes
+    # it, and only if no client was registered when the first one opened, so
+    # callers that keep a client open across calls keep their pool.
+    loop = asyncio.get_running_loop()
+    depth, owned = _ASYNC_SCOPES.get(loop, (0, loop not in _ASYNC_CLIENTS))
+    _ASYNC_SCOPES[loop] = (depth + 1, owned)
+    try:
+        yield
+    finally:
+        depth, owned = _ASYNC_SCOPES.pop(loop)
+        if depth > 1:
+            _ASYNC_SCOPES[loop] = (depth - 1, owned)
+        elif owned:
+            await close_async_http_client()
+
+
+def _env_number(name: str, default: float, cast: type) -> Any:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        value = cast(raw)
+    except ValueError as exc:
+        raise ValueError(f"{name} must be a number") from exc
+    if value < 0:
+        raise ValueError(f"{name} must be non-negative")
+    return value
+
+
+@functools.lru_cache(maxsize=1)
 def get_vision_config() -> VisionConfig:
     _ensure_env_loaded()
     api_key = os.environ.get("LLM_API_KEY", "").strip()
@@ -43,34 +156,158 @@ def get_vision_config() -> VisionConfig:
         raise ValueError("LLM_API_KEY is required")
     if not model:
         raise ValueError("LLM_MODEL is required")
+    retry_options = {
+        "max_retries": _env_number("LLM_MAX_RETRIES", 5, int),
+        "retry_base": _env_number("LLM_RETRY_BASE", 1.0, float),
+        "retry_cap": _env_number("LLM_RETRY_CAP", 30.0, float),
+    }
     if not api_base:
-        return VisionConfig(api_key=api_key, model=model)
-    return VisionConfig(api_key=api_key, model=model, api_base=api_base)
+        return VisionConfig(api_key=api_key, model=model, **retry_options)
+    return VisionConfig(api_key=api_key, model=model, api_base=api_base, **retry_options)
+
+
+def reset_vision_config_cache() -> None:
+    get_vision_config.cache_clear()
 
 
-def build_prompt(retry: bool = False) -> str:
-    base = (
+def _retry_delay(attempt: int, config: VisionConfig, response: httpx.Response | None) -> float:
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), config.retry_cap)
+        except ValueError:
+            pass
+    delay = config.retry_base * (2**attempt) + random.uniform(0, RETRY_JITTER)
+    return min(delay, config.retry_cap)
+
+
+def post_with_backoff(
+    client: httpx.Client,
+    url: str,
+    *,
+    json: Any,
+    headers: dict[str, str],
+    config: VisionConfig,
+) -> httpx.Response:
+    import httpx
+
+    # Serialize once so retries resend the same bytes.
+    content = json_dumps(json)
+    headers = {**headers, "Content-Type": "application/json"}
+    attempt = 0
+    while True:
+        final = attempt + 1 >= config.max_retries
+        try:
+            response = client.post(url, content=content, headers=headers)
+        except httpx.TransportError:
+            if final:
+                raise
+            time.sleep(_retry_delay(attempt, config, None))
+        else:
+            if response.status_code not in RETRYABLE_STATUS_CODES or final:
+                response.raise_for_status()
+                return response
+            time.sleep(_retry_delay(attempt, config, response))
+        attempt += 1
+
+
+async def post_with_backoff_async(
+    client: httpx.AsyncClient,
+    url: str,
+    *,
+    json: Any,
+    headers: dict[str, str],
+    config: VisionConfig,
+) -> httpx.Response:
+    import httpx
+
+    content = json_dumps(json)
+    headers = {**headers, "Content-Type": "application/json"}
+    attempt = 0
+    while True:
+        final = attempt + 1 >= config.max_retries
+        try:
+            response = await client.post(url, content=content, headers=headers)
+        except httpx.TransportError:
+            if final:
+                raise
+            await asyncio.sleep(_retry_delay(attempt, config, None))
+        else:
+            if response.status_code not in RETRYABLE_STATUS_CODES or final:
+                response.raise_for_status()
+                return response
+            await asyncio.sleep(_retry_delay(attempt, config, response))
+        attempt += 1
+
+
+_PROMPT_BASE = (
+    "You are a food detector. Return JSON only.\n"
+    "Identify 3-5 foods in the image. Each item has label, confidence (0-1), notes.\n"
+    "Do not compute nutrition. Use broad categories if unsure.\n"
+    "Output schema:\n"
+    "{\n"
+    '  "items": [\n'
+    '    {"label": "string", "confidence": 0.0, "notes": "string"}\n'
+    "  ],\n"
+    '  "overall_notes": "string"\n'
+    "}"
+)
+_PROMPT_RETRY_SUFFIX = "\nJSON only. No prose. No markdown."
+_PROMPT_RETRY = _PROMPT_BASE + _PROMPT_RETRY_SUFFIX
+
+
+@functools.lru_cache(maxsize=32)
+def _build_batch_prompt(batch: int, retry: bool) -> str:
+    prompt = (
         "You are a food detector. Return JSON only.\n"
-        "Identify 3-5 foods in the image. Each item has label, confidence (0-1), notes.\n"
+        f"You are given {batch} images, indexed 0 to {batch - 1} in the order they appear.\n"
+        "For each image, identify 3-5 foods. Each item has label, confidence (0-1), notes.\n"
         "Do not compute nutrition. Use broad categories if unsure.\n"
         "Output schema:\n"
         "{\n"
-        '  "items": [\n'
-        '    {"label": "string", "confidence": 0.0, "notes": "string"}\n'
-        "  ],\n"
-        '  "overall_notes": "string"\n'
+        '  "images": [\n'
+        "    {\n"
+        '      "index": 0,\n'
+        '      "items": [\n'
+        '        {"label": "string", "confidence": 0.0, "notes": "string"}\n'
+        "      ],\n"
+        '      "overall_notes": "string"\n'
+        "    }\n"
+        "  ]\n"
         "}"
     )
-    if not retry:
-        return base
-    return base + "\nJSON only. No prose. No markdown."
+    return prompt + _PROMPT_RETRY_SUFFIX if retry else prompt
+
+
+def build_prompt(retry: bool = False, batch: int = 0) -> str:
+    if batch:
+        return _build_batch_prompt(batch, retry)
+    return _PROMPT_RETRY if retry else _PROMPT_BASE
+
+
+def _strip_code_fences(text: str) -> str:
+    stripped = text.strip().removeprefix("```json").removeprefix("```").removesuffix("```")
+    start = stripped.find("{")
+    end = stripped.rfind("}")
+    if start == -1 or end < start:
+        return stripped.strip()
+    return stripped[start : end + 1]
 
 
 def parse_vision_json(text: str) -> dict[str, Any]:
     try:
-        return json.loads(text)
+        return json_loads(text)
     except json.JSONDecodeError as exc:
-        raise ValueError("vision response was not valid JSON") from exc
+        error = exc
+    # Models often wrap the JSON in markdown fences despite the prompt; unwrap
+    # locally before the caller spends an HTTP round-trip on the retry prompt.
+    unfenced = _strip_code_fences(text)
+    if unfenced != text:
+        try:
+            return json_loads(unfenced)
+        except json.JSONDecodeError:
+            pass
+    raise ValueError("vision response was not valid JSON") from error
 
 
 def parse_vision_json_with_retry(primary_text: str, retry_text: str | None) -> dict[str, Any]:
@@ -82,40 +319,79 @@ def parse_vision_json_with_retry(primary_text: str, retry_text: str | None) -> d
         return parse_vision_json(retry_text)
 
 
+def _clamp01(value: Any) -> float:
+    if not isinstance(value, (int, float)):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return 0.0
+    # NaN fails both comparisons, so test it explicitly.
+    if value != value or value <= 0.0:
+        return 0.0
+    return 1.0 if value >= 1.0 else float(value)
+
+
+def _iter_valid_items(items: list[Any]) -> Iterator[Candidate]:
+    for item in items:
+        if isinstance(item, dict):
+            yield Candidate(
+                label=str(item.get("label", "")).strip() or "Unknown",
+                confidence=_clamp01(item.get("confidence", 0.0)),
+                notes=str(item.get("notes", "")).strip(),
+            )
+
+
 def normalize_candidates(raw: dict[str, Any]) -> VisionResult:
     items = raw.get("items", [])
     if not isinstance(items, list):
         raise ValueError("vision JSON must include items list")
 
-    candidates: list[Candidate] = []
-    for item in items:
-        if not isinstance(item, dict):
-            continue
-        label = str(item.get("label", "")).strip() or "Unknown"
-        confidence_raw = item.get("confidence", 0.0)
-        try:
-            confidence = float(confidence_raw)
-        except (TypeError, ValueError):
-            confidence = 0.0
-        confidence = min(max(confidence, 0.0), 1.0)
-        notes = str(item.get("notes", "")).strip()
-        candidates.append(Candidate(label=label, confidence=confidence, notes=notes))
-
-    if not candidates:
-        candidates = [Candidate(label="Unknown", confidence=0.01, notes="")]
-
-    candidates.sort(key=lambda candidate: candidate.confidence, reverse=True)
-    if len(candidates) > 5:
-        candidates = candidates[:5]
+    candidates = heapq.nlargest(
+        5, _iter_valid_items(items), key=lambda candidate: candidate.confidence
+    )
     if len(candidates) < 3:
-        for _ in range(3 - len(candidates)):
-            candidates.append(Candidate(label="Unknown", confidence=0.01, notes=""))
+        candidates.extend(
+            Candidate(label="Unknown", confidence=0.01, notes="")
+            for _ in range(3 - len(candidates))
+        )
 
     overall_notes = str(raw.get("overall_notes", "")).strip()
     return VisionResult(items=candidates, overall_notes=overall_notes)
 
 
+def _has_items_list(raw: Any) -> bool:
+    return isinstance(raw, dict) and isinstance(raw.get("items"), list)
+
+
+def parse_batch_vision_json(text: str, count: int) -> list[dict[str, Any] | None]:
+    raw = parse_vision_json(text)
+    images = raw.get("images") if isinstance(raw, dict) else None
+    if not isinstance(images, list):
+        raise ValueError("vision JSON must include images list")
+
+    results: list[dict[str, Any] | None] = [None] * count
+    for entry in images:
+        # Entries normalize_candidates would reject count as skipped, so the
+        # caller sends those images on their own instead of caching them.
+        if not _has_items_list(entry):
+            continue
+        index = entry.get("index")
+        if type(index) is int and 0 <= index < count and results[index] is None:
+            results[index] = entry
+    return results
+
+
 def _extract_text_from_gemini_response(payload: dict[str, Any]) -> str:
+    # Fast path for the usual reply shape: one candidate with a single text part.
+    try:
+        (part,) = payload["candidates"][0]["content"]["parts"]
+        text = part["text"]
+    except (KeyError, IndexError, TypeError, ValueError):
+        pass
+    else:
+        if isinstance(text, str):
+            return text.strip()
+
     candidates = payload.get("candidates", [])
     if not isinstance(candidates, list) or not candidates:
         raise ValueError("vision response missing candidates")
@@ -132,59 +408,303 @@ def _extract_text_from_gemini_response(payload: dict[str, Any]) -> str:
     return "\n".join(texts).strip()
 
 
-def analyze_image_json(
+def _prepare_image(
+    data: bytes,
+    mime_type: str,
+    max_edge: int = IMAGE_MAX_EDGE,
+    quality: int = IMAGE_JPEG_QUALITY,
+) -> tuple[bytes, str]:
+    if len(data) < IMAGE_RESIZE_MIN_BYTES or os.environ.get("MACROCAM_NO_RESIZE") == "1":
+        return data, mime_type
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:  # pragma: no cover - optional dependency
+        return data, mime_type
+
+    buffer = io.BytesIO()
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            image = ImageOps.exif_transpose(source)
+            image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+            if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+                # JPEG has no alpha; flatten onto white rather than letting
+                # transparent areas turn black.
+                rgba = image.convert("RGBA")
+                image = Image.new("RGB", rgba.size, (255, 255, 255))
+                image.paste(rgba, mask=rgba.getchannel("A"))
+            image.convert("RGB").save(buffer, "JPEG", quality=quality, optimize=True)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return data, mime_type
+
+    prepared = buffer.getvalue()
+    if len(prepared) >= len(data):
+        return data, mime_type
+    return prepared, "image/jpeg"
+
+
+def _cache_model(config: VisionConfig | None) -> str:
+    # Cache keys only need the model name, so a cache hit must not depend on
+    # LLM_API_KEY being set; get_vision_config() is deferred to a miss.
+    if config is not None:
+        return config.model
+    _ensure_env_loaded()
+    model = os.environ.get("LLM_MODEL", "").strip()
+    if not model:
+        raise ValueError("LLM_MODEL is required")
+    return model
+
+
+def _vision_cache_key(image_bytes: bytes, model: str) -> str:
+    model = _CACHE_KEY_UNSAFE_RE.sub("_", model)
+    return f"{image_bytes_cache_key(image_bytes)}-{model}-{PROMPT_VERSION}"
+
+
+def _store_vision_cache(cache_key: str | None, raw: dict[str, Any]) -> None:
+    if cache_key is None or not _has_items_list(raw):
+        return
+    try:
+        set_vision_cache(cache_key, raw)
+    except OSError:
+        pass
+
+
+def _inline_image_part(image_bytes: bytes, mime_type: str) -> dict[str, Any]:
+    image_bytes, mime_type = _prepare_image(image_bytes, mime_type)
+    encoded = b64encode(image_bytes).decode("ascii")
+    return {"inlineData": {"mimeType": mime_type, "data": encoded}}
+
+
+def _speculative_retry_enabled() -> bool:
+    return os.environ.get("MACROCAM_SPECULATIVE_RETRY") == "1"
+
+
+def _lookup_vision_cache(
     image_bytes: bytes,
     mime_type: str,
-    config: VisionConfig | None = None,
-) -> dict[str, Any]:
+    config: VisionConfig | None,
+    use_cache: bool,
+) -> tuple[str | None, dict[str, Any] | None]:
     if not mime_type:
         raise ValueError("mime_type is required")
+    if not use_cache:
+        return None, None
+    cache_key = _vision_cache_key(image_bytes, _cache_model(config))
+    cached = get_vision_cache(cache_key)
+    return cache_key, cached if _has_items_list(cached) else None
+
+
+def _build_vision_request(
+    image_bytes: bytes,
+    mime_type: str,
+    config: VisionConfig,
+) -> tuple[str, dict[str, str], dict[str, Any], dict[str, Any]]:
+    url = f"{config.api_base}/models/{config.model}:generateContent"
+    inline = _inline_image_part(image_bytes, mime_type)
+    payload = {
+        "contents": [{"role": "user", "parts": [{"text": build_prompt(retry=False)}, inline]}]
+    }
+    retry_payload = {
+        "contents": [{"role": "user", "parts": [{"text": build_prompt(retry=True)}, inline]}]
+    }
+    headers = {"x-goog-api-key": config.api_key}
+    return url, headers, payload, retry_payload
 
-    if config is None:
-        config = get_vision_config()
 
-    encoded = base64.b64encode(image_bytes).decode("ascii")
+def _build_batch_request(
+    batch: list[tuple[bytes, str]],
+    config: VisionConfig,
+) -> tuple[str, dict[str, str], dict[str, Any], dict[str, Any]]:
     url = f"{config.api_base}/models/{config.model}:generateContent"
+    inline = [_inline_image_part(image_bytes, mime_type) for image_bytes, mime_type in batch]
     payload = {
         "contents": [
-            {
-                "role": "user",
-                "parts": [
-                    {"text": build_prompt(retry=False)},
-                    {"inlineData": {"mimeType": mime_type, "data": encoded}},
-                ],
-            }
+            {"role": "user", "parts": [{"text": build_prompt(batch=len(batch))}, *inline]}
         ]
     }
     retry_payload = {
         "contents": [
             {
                 "role": "user",
-                "parts": [
-                    {"text": build_prompt(retry=True)},
-                    {"inlineData": {"mimeType": mime_type, "data": encoded}},
-                ],
+                "parts": [{"text": build_prompt(retry=True, batch=len(batch))}, *inline],
             }
         ]
     }
-
     headers = {"x-goog-api-key": config.api_key}
-    timeout = httpx.Timeout(30.0)
-    with httpx.Client(timeout=timeout) as client:
-        response = client.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        primary_text = _extract_text_from_gemini_response(response.json())
-        try:
-            raw = parse_vision_json(primary_text)
-        except ValueError:
-            retry = client.post(url, json=retry_payload, headers=headers)
-            retry.raise_for_status()
-            retry_text = _extract_text_from_gemini_response(retry.json())
-            raw = parse_vision_json_with_retry(primary_text, retry_text)
+    return url, headers, payload, retry_payload
 
+
+def _response_text(response: httpx.Response) -> str:
+    return _extract_text_from_gemini_response(json_loads(response.content))
+
+
+def _post_parse_or_retry(
+    post: Callable[..., httpx.Response],
+    payload: dict[str, Any],
+    retry_payload: dict[str, Any],
+    parse: Callable[[str], T],
+) -> T:
+    primary_text = _response_text(post(json=payload))
+    try:
+        return parse(primary_text)
+    except ValueError:
+        return parse(_response_text(post(json=retry_payload)))
+
+
+async def _post_parse_or_retry_async(
+    post: Callable[..., Awaitable[httpx.Response]],
+    payload: dict[str, Any],
+    retry_payload: dict[str, Any],
+    parse: Callable[[str], T],
+) -> T:
+    primary_text = _response_text(await post(json=payload))
+    try:
+        return parse(primary_text)
+    except ValueError:
+        return parse(_response_text(await post(json=retry_payload)))
+
+
+def analyze_image_json(
+    image_bytes: bytes,
+    mime_type: str,
+    config: VisionConfig | None = None,
+    *,
+    use_cache: bool = True,
+    speculative: bool | None = None,
+) -> dict[str, Any]:
+    cache_key, cached = _lookup_vision_cache(image_bytes, mime_type, config, use_cache)
+    if cached is not None:
+        return cached
+    if config is None:
+        config = get_vision_config()
+
+    url, headers, payload, retry_payload = _build_vision_request(
+        image_bytes, mime_type, config
+    )
+    if speculative is None:
+        speculative = _speculative_retry_enabled()
+    if speculative:
+        # Racing both prompts needs an event loop; the sync API runs one for
+        # the call and closes its client afterwards.
+        raw = asyncio.run(
+            _post_speculative_in_new_loop(url, headers, payload, retry_payload, config)
+        )
+    else:
+        post = functools.partial(
+            post_with_backoff, get_http_client(), url, headers=headers, config=config
+        )
+        raw = _post_parse_or_retry(post, payload, retry_payload, parse_vision_json)
+    _store_vision_cache(cache_key, raw)
+    return raw
+
+
+async def analyze_image_json_async(
+    image_bytes: bytes,
+    mime_type: str,
+    config: VisionConfig | None = None,
+    *,
+    use_cache: bool = True,
+) -> dict[str, Any]:
+    # Hashing the image and reading the disk cache block; like the request
+    # building below, keep them off the event loop.
+    cache_key, cached = await asyncio.to_thread(
+        _lookup_vision_cache, image_bytes, mime_type, config, use_cache
+    )
+    if cached is not None:
+        return cached
+    if config is None:
+        config = get_vision_config()
+
+    # Resizing and base64 encoding are CPU-bound; keep them off the event loop
+    # so concurrent analyses are not serialised behind them.
+    url, headers, payload, retry_payload = await asyncio.to_thread(
+        _build_vision_request, image_bytes, mime_type, config
+    )
+    post = functools.partial(
+        post_with_backoff_async, get_async_http_client(), url, headers=headers, config=config
+    )
+    raw = await _post_parse_or_retry_async(post, payload, retry_payload, parse_vision_json)
+    await asyncio.to_thread(_store_vision_cache, cache_key, raw)
     return raw
 
 
+async def analyze_image_json_speculative(
+    image_bytes: bytes,
+    mime_type: str,
+    config: VisionConfig | None = None,
+    *,
+    speculative: bool | None = None,
+    use_cache: bool = True,
+) -> dict[str, Any]:
+    if speculative is None:
+        speculative = _speculative_retry_enabled()
+    if not speculative:
+        return await analyze_image_json_async(
+            image_bytes, mime_type, config, use_cache=use_cache
+        )
+
+    cache_key, cached = await asyncio.to_thread(
+        _lookup_vision_cache, image_bytes, mime_type, config, use_cache
+    )
+    if cached is not None:
+        return cached
+    if config is None:
+        config = get_vision_config()
+
+    url, headers, payload, retry_payload = await asyncio.to_thread(
+        _build_vision_request, image_bytes, mime_type, config
+    )
+    post = functools.partial(
+        post_with_backoff_async, get_async_http_client(), url, headers=headers, config=config
+    )
+    raw = await _post_speculative(post, payload, retry_payload)
+    await asyncio.to_thread(_store_vision_cache, cache_key, raw)
+    return raw
+
+
+async def _post_speculative_in_new_loop(
+    url: str,
+    headers: dict[str, str],
+    payload: dict[str, Any],
+    retry_payload: dict[str, Any],
+    config: VisionConfig,
+) -> dict[str, Any]:
+    async with _async_client_scope():
+        post = functools.partial(
+            post_with_backoff_async, get_async_http_client(), url, headers=headers, config=config
+        )
+        return await _post_speculative(post, payload, retry_payload)
+
+
+async def _post_speculative(
+    post: Callable[..., Awaitable[httpx.Response]],
+    payload: dict[str, Any],
+    retry_payload: dict[str, Any],
+) -> dict[str, Any]:
+    import httpx
+
+    async def request(body: dict[str, Any]) -> dict[str, Any]:
+        return parse_vision_json(_response_text(await post(json=body)))
+
+    # Send the primary and retry prompts together and keep the first valid answer.
+    pending = {asyncio.create_task(request(payload)), asyncio.create_task(request(retry_payload))}
+    errors: list[Exception] = []
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    raw = task.result()
+                except (ValueError, httpx.HTTPError) as exc:
+                    errors.append(exc)
+                    continue
+                return raw
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    raise errors[-1]
+
+
 def analyze_image(
     image_bytes: bytes,
     mime_type: str,
@@ -192,3 +712,134 @@ def analyze_image(
 ) -> VisionResult:
     raw = analyze_image_json(image_bytes=image_bytes, mime_type=mime_type, config=config)
     return normalize_candidates(raw)
+
+
+async def analyze_image_async(
+    image_bytes: bytes,
+    mime_type: str,
+    config: VisionConfig | None = None,
+) -> VisionResult:
+    raw = await analyze_image_json_async(
+        image_bytes=image_bytes, mime_type=mime_type, config=config
+    )
+    return normalize_candidates(raw)
+
+
+async def analyze_image_speculative(
+    image_bytes: bytes,
+    mime_type: str,
+    config: VisionConfig | None = None,
+    *,
+    speculative: bool | None = None,
+) -> VisionResult:
+    raw = await analyze_image_json_speculative(
+        image_bytes, mime_type, config, speculative=speculative
+    )
+    return normalize_candidates(raw)
+
+
+async def analyze_images(
+    items: list[tuple[bytes, str]],
+    config: VisionConfig | None = None,
+) -> list[VisionResult]:
+    async with _async_client_scope():
+        tasks = [
+            analyze_image_async(image_bytes, mime_type, config)
+            for image_bytes, mime_type in items
+        ]
+        return list(await asyncio.gather(*tasks))
+
+
+def _lookup_batch_cache(
+    items: list[tuple[bytes, str]],
+    model: str,
+    batch_size: int,
+) -> tuple[list[str], list[dict[str, Any] | None], list[list[int]]]:
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    keys: list[str] = []
+    raws: list[dict[str, Any] | None] = []
+    for image_bytes, mime_type in items:
+        if not mime_type:
+            raise ValueError("mime_type is required")
+        key = _vision_cache_key(image_bytes, model)
+        keys.append(key)
+        cached = get_vision_cache(key)
+        raws.append(cached if _has_items_list(cached) else None)
+    pending = [index for index, raw in enumerate(raws) if raw is None]
+    batches = [pending[start : start + batch_size] for start in range(0, len(pending), batch_size)]
+    return keys, raws, batches
+
+
+def _analyze_batch_json(
+    batch: list[tuple[bytes, str]],
+    config: VisionConfig,
+) -> list[dict[str, Any] | None]:
+    url, headers, payload, retry_payload = _build_batch_request(batch, config)
+    post = functools.partial(
+        post_with_backoff, get_http_client(), url, headers=headers, config=config
+    )
+    parse = functools.partial(parse_batch_vision_json, count=len(batch))
+    return _post_parse_or_retry(post, payload, retry_payload, parse)
+
+
+async def _analyze_batch_json_async(
+    batch: list[tuple[bytes, str]],
+    config: VisionConfig,
+) -> list[dict[str, Any] | None]:
+    url, headers, payload, retry_payload = await asyncio.to_thread(
+        _build_batch_request, batch, config
+    )
+    post = functools.partial(
+        post_with_backoff_async, get_async_http_client(), url, headers=headers, config=config
+    )
+    parse = functools.partial(parse_batch_vision_json, count=len(batch))
+    return await _post_parse_or_retry_async(post, payload, retry_payload, parse)
+
+
+def analyze_images_batched(
+    items: list[tuple[bytes, str]],
+    config: VisionConfig | None = None,
+    *,
+    batch_size: int = 8,
+) -> list[VisionResult]:
+    keys, raws, batches = _lookup_batch_cache(items, _cache_model(config), batch_size)
+    if batches and config is None:
+        config = get_vision_config()
+    for indices in batches:
+        results = _analyze_batch_json([items[index] for index in indices], config)
+        for index, raw in zip(indices, results):
+            # Images the model skipped in its batch answer get a request of their own.
+            if raw is None:
+                image_bytes, mime_type = items[index]
+                raw = analyze_image_json(image_bytes, mime_type, config)
+            else:
+                _store_vision_cache(keys[index], raw)
+            raws[index] = raw
+    return [normalize_candidates(raw) for raw in raws]
+
+
+async def analyze_images_batched_async(
+    items: list[tuple[bytes, str]],
+    config: VisionConfig | None = None,
+    *,
+    batch_size: int = 8,
+) -> list[VisionResult]:
+    model = _cache_model(config)
+    keys, raws, batches = await asyncio.to_thread(_lookup_batch_cache, items, model, batch_size)
+    if batches and config is None:
+        config = get_vision_config()
+
+    async def run(indices: list[int]) -> None:
+        results = await _analyze_batch_json_async([items[index] for index in indices], config)
+        for index, raw in zip(indices, results):
+            if raw is None:
+                image_bytes, mime_type = items[index]
+                raw = await analyze_image_json_async(image_bytes, mime_type, config)
+            else:
+                await asyncio.to_thread(_store_vision_cache, keys[index], raw)
+            raws[index] = raw
+
+    async with _async_client_scope():
+        await asyncio.gather(*(run(indices) for indices in batches))
+    return [normalize_candidates(raw) for raw in raws]
@@ -0,0 +1,15 @@
+import pytest
+
+from macrocam.vision import reset_vision_config_cache
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache_dir(monkeypatch, tmp_path) -> None:
+    monkeypatch.setenv("MACROCAM_CACHE_DIR", str(tmp_path / "cache"))
+
+
+@pytest.fixture(autouse=True)
+def _fresh_vision_config():
+    reset_vision_config_cache()
+    yield
+    reset_vision_config_cache()
@@ -1,4 +1,9 @@
-from macrocam.cache import get_vision_cache, set_vision_cache
+from macrocam.cache import (
+    get_index_cache,
+    get_vision_cache,
+    set_index_cache,
+    set_vision_cache,
+)
 
 
 def test_cache_roundtrip(tmp_path) -> None:
@@ -22,3 +27,30 @@ def test_cache_corrupt_json_returns_none(tmp_path) -> None:
 
     assert get_vision_cache(image_hash, base_dir=tmp_path) is None
     assert not cache_path.exists()
+
+
+def test_index_cache_roundtrip_and_tag_mismatch(tmp_path) -> None:
+    payload = {"1": {"1008": 250.0}}
+
+    set_index_cache("food_nutrient.idx", ("food_nutrient.csv", 1), payload, base_dir=tmp_path)
+
+    assert get_index_cache("food_nutrient.idx", ("food_nutrient.csv", 1), base_dir=tmp_path) == payload
+    assert get_index_cache("food_nutrient.idx", ("food_nutrient.csv", 2), base_dir=tmp_path) is None
+
+
+def test_index_cache_missing_or_corrupt_returns_none(tmp_path) -> None:
+    assert get_index_cache("food_nutrient.idx", ("food_nutrient.csv", 1), base_dir=tmp_path) is None
+
+    path = tmp_path / "food_nutrient.idx.pickle"
+    path.write_bytes(b"not a pickle")
+
+    assert get_index_cache("food_nutrient.idx", ("food_nutrient.csv", 1), base_dir=tmp_path) is None
+    assert not path.exists()
+
+
+def test_cache_hit_served_from_memory(tmp_path) -> None:
+    payload = {"items": [{"label": "Soup", "confidence": 0.7, "notes": ""}]}
+    set_vision_cache("memo", payload, base_dir=tmp_path)
+    (tmp_path / "memo.json").unlink()
+
+    assert get_vision_cache("memo", base_dir=tmp_path) == payload
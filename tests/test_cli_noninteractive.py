@@ -6,9 +6,11 @@ from typer.testing import CliRunner
 from macrocam.cli import app
 from macrocam.models import DbMatch, NutritionFacts
 
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*[mK]")
+
 
 def _strip_ansi(text: str) -> str:
-    return re.sub(r"\x1b\[[0-9;]*[mK]", "", text)
+    return _ANSI_RE.sub("", text)
 
 
 def _fake_match() -> DbMatch:
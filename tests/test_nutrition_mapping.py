@@ -1,7 +1,12 @@
 import csv
+import importlib.util
+import os
 from pathlib import Path
 
-from macrocam.nutrition import lookup_usda_food, search_usda_foods
+import pytest
+
+from macrocam import nutrition
+from macrocam.nutrition import lookup_usda_food, search_usda_foods, search_usda_foods_multi
 
 
 def _write_csv(path: Path, header: list[str], rows: list[list[str]]) -> None:
@@ -105,3 +110,101 @@ def test_lookup_usda_food_with_fallback_queries(tmp_path: Path) -> None:
 
     assert match.fdc_id == "1"
     assert match.description == "Test Food"
+
+
+def test_search_usda_foods_reloads_changed_food_csv(tmp_path: Path) -> None:
+    data_dir = _setup_usda_dir(tmp_path)
+    assert search_usda_foods("test food", data_dir)[0].fdc_id == "1"
+
+    food_path = data_dir / "food.csv"
+    _write_csv(
+        food_path,
+        ["fdc_id", "data_type", "description", "food_category_id", "publication_date"],
+        [["3", "foundation_food", "Test Food", "Test Category", "2024-01-01"]],
+    )
+    stat = food_path.stat()
+    os.utime(food_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert search_usda_foods("test food", data_dir)[0].fdc_id == "3"
+
+
+def test_lookup_usda_food_persists_nutrient_indexes(tmp_path: Path) -> None:
+    data_dir = _setup_usda_dir(tmp_path)
+    cache_dir = Path(os.environ["MACROCAM_CACHE_DIR"])
+
+    lookup_usda_food("test food", data_dir, use_llm_fallback=False)
+
+    assert (cache_dir / "nutrient_ids.pickle").exists()
+    assert (cache_dir / "food_nutrient.idx.pickle").exists()
+
+
+def test_search_usda_foods_multi_keeps_query_order(tmp_path: Path) -> None:
+    data_dir = _setup_usda_dir(tmp_path)
+
+    matches = search_usda_foods_multi(["other item", "  ", "test food"], data_dir)
+
+    assert [match.fdc_id for match in matches] == ["2", "1"]
+
+
+def test_persisted_nutrient_ids_follow_preference_changes(tmp_path: Path, monkeypatch) -> None:
+    data_dir = _setup_usda_dir(tmp_path)
+    nutrition._resolve_nutrient_ids_cached.cache_clear()
+    assert nutrition._resolve_nutrient_ids(data_dir)["calories_kcal"] == ["1008"]
+
+    monkeypatch.setitem(nutrition.NUTRIENT_NAME_PREFERENCES, "calories_kcal", ["Total Sugars"])
+    nutrition._resolve_nutrient_ids_cached.cache_clear()
+
+    assert nutrition._resolve_nutrient_ids(data_dir)["calories_kcal"] == ["2000"]
+
+
+def test_persisted_food_nutrient_index_is_versioned(tmp_path: Path, monkeypatch) -> None:
+    data_dir = _setup_usda_dir(tmp_path)
+    assert lookup_usda_food("test food", data_dir).per_100g.calories_kcal == 250
+
+    nutrient_path = data_dir / "food_nutrient.csv"
+    stat = nutrient_path.stat()
+    nutrient_path.write_text(nutrient_path.read_text().replace("1,1008,250", "1,1008,300"))
+    os.utime(nutrient_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    nutrition._load_food_nutrient_index_cached.cache_clear()
+    assert lookup_usda_food("test food", data_dir).per_100g.calories_kcal == 250
+
+    monkeypatch.setattr(nutrition, "INDEX_CACHE_VERSION", nutrition.INDEX_CACHE_VERSION + 1)
+    nutrition._load_food_nutrient_index_cached.cache_clear()
+
+    assert lookup_usda_food("test food", data_dir).per_100g.calories_kcal == 300
+
+
+def test_food_nutrient_index_readers_agree(tmp_path: Path, monkeypatch) -> None:
+    path = tmp_path / "food_nutrient.csv"
+    _write_csv(
+        path,
+        ["id", "fdc_id", "nutrient_id", "amount"],
+        [
+            ["1", " 7 ", " 1008 ", " 250 "],
+            ["2", "7", "1003", ""],
+            ["3", "7", "1004", "abc"],
+            ["4", "7", "1004", "1e1"],
+            ["5", "8", "1008", "1.5"],
+            ["6", "8", "1008", "9"],
+            ["7", "9", "9999", "3"],
+        ],
+    )
+    required = frozenset({"1003", "1004", "1008"})
+
+    default_index = nutrition._read_food_nutrient_index(str(path), required)
+    if importlib.util.find_spec("pyarrow") is not None:
+        assert nutrition._read_food_nutrient_index_arrow(str(path), required) == default_index
+    monkeypatch.setattr(nutrition, "_read_food_nutrient_index_arrow", lambda *args: None)
+    csv_index = nutrition._read_food_nutrient_index(str(path), required)
+
+    assert default_index == csv_index == {"7": {"1008": 250.0, "1004": 10.0}, "8": {"1008": 1.5}}
+
+
+@pytest.mark.parametrize("name", ["food.csv", "nutrient.csv", "food_nutrient.csv"])
+@pytest.mark.parametrize("content", ["", "1,2,3\n"])
+def test_lookup_usda_food_reports_malformed_files(tmp_path: Path, name: str, content: str) -> None:
+    data_dir = _setup_usda_dir(tmp_path)
+    (data_dir / name).write_text(content)
+
+    with pytest.raises(ValueError, match=f"Malformed USDA file: .*{name}"):
+        lookup_usda_food("test food", data_dir, use_llm_fallback=False)
@@ -1,6 +1,14 @@
 from pathlib import Path
 
-from macrocam.utils import sha256_bytes, sha256_file
+import pytest
+
+from macrocam.utils import (
+    BLAKE3_THREADED_MIN_BYTES,
+    blake3,
+    image_bytes_cache_key,
+    sha256_bytes,
+    sha256_file,
+)
 
 
 def test_sha256_file_matches_bytes(tmp_path: Path) -> None:
@@ -9,3 +17,15 @@ def test_sha256_file_matches_bytes(tmp_path: Path) -> None:
     path.write_bytes(data)
 
     assert sha256_file(path) == sha256_bytes(data)
+
+
+@pytest.mark.parametrize("size", [0, 13, BLAKE3_THREADED_MIN_BYTES + 1])
+def test_image_bytes_cache_key_is_namespaced_by_algorithm(size: int) -> None:
+    data = b"x" * size
+
+    key = image_bytes_cache_key(data)
+
+    if blake3 is None:
+        assert key == f"sha256-{sha256_bytes(data)}"
+    else:
+        assert key == f"blake3-{blake3(data).hexdigest()}"
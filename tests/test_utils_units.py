@@ -3,12 +3,15 @@ import pytest
 from macrocam.utils import parse_grams
 
 
-@pytest.mark.parametrize("raw, expected", [("250", 250.0), ("250g", 250.0), (" 250 g ", 250.0)])
+@pytest.mark.parametrize(
+    "raw, expected",
+    [("250", 250.0), ("250g", 250.0), (" 250 g ", 250.0), ("12.5 grams", 12.5), ("80 G", 80.0)],
+)
 def test_parse_grams_valid(raw: str, expected: float) -> None:
     assert parse_grams(raw) == expected
 
 
-@pytest.mark.parametrize("raw", ["0", "-1", "10oz", "abc", ""])
+@pytest.mark.parametrize("raw", ["0", "000", "-1", "10oz", "abc", "", "1.", ".5", "5 kg", "2g!"])
 def test_parse_grams_invalid(raw: str) -> None:
     with pytest.raises(ValueError):
         parse_grams(raw)
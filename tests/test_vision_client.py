@@ -0,0 +1,557 @@
+import asyncio
+import io
+import json
+import threading
+
+import httpx
+import pytest
+
+from macrocam import vision
+from macrocam.vision import (
+    VisionConfig,
+    analyze_images,
+    analyze_images_batched,
+    analyze_images_batched_async,
+)
+
+
+def _gemini_text_body(text: str) -> dict:
+    return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+
+def _gemini_body(label: str) -> dict:
+    items = [{"label": label, "confidence": 0.9, "notes": ""}]
+    return _gemini_text_body(json.dumps({"items": items}))
+
+
+def _gemini_batch_body(labels: list[str]) -> dict:
+    images = [
+        {"index": index, "items": [{"label": label, "confidence": 0.9, "notes": ""}]}
+        for index, label in enumerate(labels)
+    ]
+    return _gemini_text_body(json.dumps({"images": images[::-1]}))
+
+
+def _config() -> VisionConfig:
+    return VisionConfig(api_key="test-key", model="test-model")
+
+
+@pytest.fixture
+def mock_http(monkeypatch):
+    def install(handler) -> None:
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(vision, "get_http_client", lambda: client)
+
+    return install
+
+
+@pytest.fixture
+def mock_async_http(monkeypatch):
+    # Registers one mock-transport client per running loop, like the real
+    # get_async_http_client, so the package's close logic applies to it.
+    created: list[httpx.AsyncClient] = []
+
+    def install(handler) -> list[httpx.AsyncClient]:
+        def factory() -> httpx.AsyncClient:
+            loop = asyncio.get_running_loop()
+            client = vision._ASYNC_CLIENTS.get(loop)
+            if client is None:
+                client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+                vision._ASYNC_CLIENTS[loop] = client
+                created.append(client)
+            return client
+
+        monkeypatch.setattr(vision, "get_async_http_client", factory)
+        return created
+
+    yield install
+    for client in created:
+        if not client.is_closed:
+            asyncio.run(client.aclose())
+
+
+def test_analyze_images_returns_results_in_input_order(mock_async_http) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        label = body["contents"][0]["parts"][1]["inlineData"]["data"]
+        return httpx.Response(200, json=_gemini_body(label))
+
+    mock_async_http(handler)
+    items = [(b"one", "image/png"), (b"two", "image/png")]
+
+    results = asyncio.run(analyze_images(items, config=_config()))
+
+    assert [result.items[0].label for result in results] == ["b25l", "dHdv"]
+
+
+def test_analyze_image_json_retries_transient_errors(mock_http) -> None:
+    statuses = iter([503, 429, 200])
+    bodies = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["Content-Type"] == "application/json"
+        bodies.append(request.content)
+        status = next(statuses)
+        if status != 200:
+            return httpx.Response(status, headers={"Retry-After": "0"})
+        return httpx.Response(200, json=_gemini_body("Soup"))
+
+    mock_http(handler)
+
+    raw = vision.analyze_image_json(b"image", "image/png", config=_config())
+
+    assert raw["items"][0]["label"] == "Soup"
+    assert len(set(bodies)) == 1
+    assert json.loads(bodies[0])["contents"][0]["parts"][1]["inlineData"]["data"] == "aW1hZ2U="
+
+
+def test_prepare_image_downscales_large_images() -> None:
+    Image = pytest.importorskip("PIL.Image")
+    source = Image.effect_noise((1400, 1000), 64).convert("RGB")
+    buffer = io.BytesIO()
+    source.save(buffer, "PNG")
+    data = buffer.getvalue()
+
+    prepared, mime_type = vision._prepare_image(data, "image/png")
+
+    assert mime_type == "image/jpeg"
+    assert len(prepared) < len(data)
+    with Image.open(io.BytesIO(prepared)) as image:
+        assert max(image.size) == vision.IMAGE_MAX_EDGE
+
+
+def test_prepare_image_flattens_transparency_onto_white() -> None:
+    Image = pytest.importorskip("PIL.Image")
+    source = Image.effect_noise((1400, 1000), 64).convert("RGBA")
+    source.putalpha(0)
+    buffer = io.BytesIO()
+    source.save(buffer, "PNG")
+
+    prepared, mime_type = vision._prepare_image(buffer.getvalue(), "image/png")
+
+    assert mime_type == "image/jpeg"
+    with Image.open(io.BytesIO(prepared)) as image:
+        assert min(image.convert("L").getextrema()) >= 250
+
+
+def test_async_analysis_prepares_images_off_the_event_loop(monkeypatch, mock_async_http) -> None:
+    threads = []
+
+    def fake_prepare(data: bytes, mime_type: str) -> tuple[bytes, str]:
+        threads.append(threading.current_thread())
+        return data, mime_type
+
+    monkeypatch.setattr(vision, "_prepare_image", fake_prepare)
+
+    mock_async_http(lambda request: httpx.Response(200, json=_gemini_body("Egg")))
+
+    asyncio.run(analyze_images([(b"egg", "image/png")], config=_config()))
+
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_prepare_image_keeps_small_images() -> None:
+    assert vision._prepare_image(b"tiny", "image/png") == (b"tiny", "image/png")
+
+
+def test_analyze_image_json_uses_response_cache(mock_http) -> None:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json=_gemini_body("Salad"))
+
+    mock_http(handler)
+
+    first = vision.analyze_image_json(b"same-image", "image/png", config=_config())
+    second = vision.analyze_image_json(b"same-image", "image/png", config=_config())
+    other_model = VisionConfig(api_key="test-key", model="other-model")
+    vision.analyze_image_json(b"same-image", "image/png", config=other_model)
+
+    assert first == second
+    assert len(calls) == 2
+
+
+def _batch_handler(calls: list[int]):
+    def handler(request: httpx.Request) -> httpx.Response:
+        parts = json.loads(request.content)["contents"][0]["parts"]
+        calls.append(len(parts) - 1)
+        labels = [part["inlineData"]["data"] for part in parts[1:]]
+        return httpx.Response(200, json=_gemini_batch_body(labels))
+
+    return handler
+
+
+def test_analyze_images_batched_groups_images_per_request(mock_http) -> None:
+    calls: list[int] = []
+    mock_http(_batch_handler(calls))
+    items = [(b"one", "image/png"), (b"two", "image/png"), (b"three", "image/png")]
+
+    results = analyze_images_batched(items, config=_config(), batch_size=2)
+    cached = analyze_images_batched(items, config=_config(), batch_size=2)
+
+    assert calls == [2, 1]
+    assert [result.items[0].label for result in results] == ["b25l", "dHdv", "dGhyZWU="]
+    assert cached == results
+
+
+def test_analyze_images_batched_async_runs_batches_concurrently(mock_async_http) -> None:
+    calls: list[int] = []
+    mock_async_http(_batch_handler(calls))
+    items = [(b"one", "image/png"), (b"two", "image/png")]
+
+    results = asyncio.run(analyze_images_batched_async(items, config=_config(), batch_size=1))
+
+    assert calls == [1, 1]
+    assert [result.items[0].label for result in results] == ["b25l", "dHdv"]
+
+
+def test_analyze_image_speculative_returns_first_valid_reply(monkeypatch, mock_async_http) -> None:
+    prompts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        prompt = json.loads(request.content)["contents"][0]["parts"][0]["text"]
+        prompts.append(prompt)
+        if prompt == vision.build_prompt(retry=True):
+            return httpx.Response(200, json=_gemini_body("Rice"))
+        return httpx.Response(200, json=_gemini_text_body("no"))
+
+    monkeypatch.setenv("MACROCAM_SPECULATIVE_RETRY", "1")
+    mock_async_http(handler)
+
+    result = asyncio.run(vision.analyze_image_speculative(b"image", "image/png", _config()))
+
+    assert result.items[0].label == "Rice"
+    assert sorted(prompts) == sorted([vision.build_prompt(), vision.build_prompt(retry=True)])
+
+
+def test_get_vision_config_is_cached_until_reset(monkeypatch) -> None:
+    monkeypatch.setenv("LLM_API_KEY", "key")
+    monkeypatch.setenv("LLM_MODEL", "first-model")
+    first = vision.get_vision_config()
+    monkeypatch.setenv("LLM_MODEL", "second-model")
+
+    assert vision.get_vision_config() is first
+
+    vision.reset_vision_config_cache()
+
+    assert vision.get_vision_config().model == "second-model"
+
+
+def test_analyze_image_json_unwraps_fences_without_retry(mock_http) -> None:
+    calls = []
+    fenced = "```json\n" + json.dumps({"items": [{"label": "Pho", "confidence": 0.8}]}) + "\n```"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json=_gemini_text_body(fenced))
+
+    mock_http(handler)
+
+    raw = vision.analyze_image_json(b"noodles", "image/png", config=_config())
+
+    assert raw["items"][0]["label"] == "Pho"
+    assert len(calls) == 1
+
+
+def _tea(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json=_gemini_body("Tea"))
+
+
+def test_analyze_images_closes_the_client_it_created(mock_async_http) -> None:
+    created = mock_async_http(_tea)
+
+    asyncio.run(analyze_images([(b"cup", "image/png")], config=_config()))
+
+    assert len(created) == 1
+    assert created[0].is_closed
+
+
+def test_analyze_images_keeps_a_caller_owned_client_open(mock_async_http) -> None:
+    mock_async_http(_tea)
+
+    async def run() -> tuple[bool, bool]:
+        client = vision.get_async_http_client()
+        await analyze_images([(b"cup", "image/png")], config=_config())
+        open_after_batch = not client.is_closed
+        await vision.close_async_http_client()
+        return open_after_batch, client.is_closed
+
+    assert asyncio.run(run()) == (True, True)
+
+
+def test_analyze_images_batched_retries_with_strict_prompt(mock_http) -> None:
+    prompts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        parts = json.loads(request.content)["contents"][0]["parts"]
+        prompts.append(parts[0]["text"])
+        if len(prompts) == 1:
+            return httpx.Response(200, json=_gemini_text_body("not json"))
+        return httpx.Response(200, json=_gemini_batch_body(["Soup", "Bread"]))
+
+    mock_http(handler)
+
+    results = analyze_images_batched([(b"a", "image/png"), (b"b", "image/png")], config=_config())
+
+    assert prompts == [vision.build_prompt(batch=2), vision.build_prompt(retry=True, batch=2)]
+    assert [result.items[0].label for result in results] == ["Soup", "Bread"]
+
+
+def test_analyze_image_json_speculates_when_env_enabled(monkeypatch, mock_async_http) -> None:
+    prompts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        prompt = json.loads(request.content)["contents"][0]["parts"][0]["text"]
+        prompts.append(prompt)
+        if prompt == vision.build_prompt(retry=True):
+            return httpx.Response(200, json=_gemini_body("Curry"))
+        return httpx.Response(200, json=_gemini_text_body("no"))
+
+    monkeypatch.setenv("MACROCAM_SPECULATIVE_RETRY", "1")
+    created = mock_async_http(handler)
+    monkeypatch.setattr(vision, "get_http_client", lambda: pytest.fail("sync client used"))
+
+    raw = vision.analyze_image_json(b"plate", "image/png", config=_config())
+
+    assert raw["items"][0]["label"] == "Curry"
+    assert len(prompts) == 2
+    assert created[0].is_closed
+
+
+def test_overlapping_analyze_images_share_the_loop_client(mock_async_http) -> None:
+    attempts: dict[str, int] = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        label = json.loads(request.content)["contents"][0]["parts"][1]["inlineData"]["data"]
+        attempts[label] = attempts.get(label, 0) + 1
+        if label == vision.b64encode(b"b").decode("ascii") and attempts[label] == 1:
+            return httpx.Response(503, headers={"Retry-After": "0.05"})
+        return httpx.Response(200, json=_gemini_body(label))
+
+    created = mock_async_http(handler)
+
+    async def run() -> list[list[vision.VisionResult]]:
+        return await asyncio.gather(
+            analyze_images([(b"a", "image/png")], config=_config()),
+            analyze_images([(b"b", "image/png")], config=_config()),
+        )
+
+    first, second = asyncio.run(run())
+
+    assert first[0].items and second[0].items
+    assert len(created) == 1
+    assert created[0].is_closed
+
+
+def test_cache_hits_do_not_require_an_api_key(monkeypatch, mock_http) -> None:
+    mock_http(lambda request: httpx.Response(200, json=_gemini_body("Rice")))
+    vision.analyze_image_json(b"bowl", "image/png", config=_config())
+
+    monkeypatch.setattr(vision, "_ENV_LOADED", True)
+    monkeypatch.delenv("LLM_API_KEY", raising=False)
+    monkeypatch.setenv("LLM_MODEL", "test-model")
+    mock_http(lambda request: pytest.fail("cache hit expected"))
+
+    assert vision.analyze_image_json(b"bowl", "image/png")["items"][0]["label"] == "Rice"
+    assert analyze_images_batched([(b"bowl", "image/png")])[0].items[0].label == "Rice"
+    with pytest.raises(ValueError, match="LLM_API_KEY is required"):
+        vision.analyze_image_json(b"plate", "image/png")
+
+
+def test_replies_without_an_items_list_are_not_cached(mock_http) -> None:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json=_gemini_text_body('{"items": "rice"}'))
+
+    mock_http(handler)
+
+    for _ in range(2):
+        assert vision.analyze_image_json(b"bowl", "image/png", config=_config()) == {
+            "items": "rice"
+        }
+
+    assert len(calls) == 2
+
+
+def test_analyze_images_batched_resends_entries_without_an_items_list(mock_http) -> None:
+    calls: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        parts = json.loads(request.content)["contents"][0]["parts"]
+        calls.append(len(parts) - 1)
+        if len(parts) == 2:
+            return httpx.Response(200, json=_gemini_body("Rice"))
+        images = [
+            {"index": 0, "items": [{"label": "Soup", "confidence": 0.9, "notes": ""}]},
+            {"index": 1, "items": "rice"},
+        ]
+        return httpx.Response(200, json=_gemini_text_body(json.dumps({"images": images})))
+
+    mock_http(handler)
+    items = [(b"a", "image/png"), (b"b", "image/png")]
+
+    results = analyze_images_batched(items, config=_config())
+    cached = analyze_images_batched(items, config=_config())
+
+    assert [result.items[0].label for result in results] == ["Soup", "Rice"]
+    assert [result.items[0].label for result in cached] == ["Soup", "Rice"]
+    assert calls == [2, 1]
+
+
+@pytest.mark.parametrize(
+    "analyze",
+    [
+        lambda items: analyze_images(items, config=_config()),
+        lambda items: vision.analyze_image_speculative(*items[0], _config(), speculative=True),
+        lambda items: analyze_images_batched_async(items, config=_config()),
+    ],
+    ids=["single", "speculative", "batched"],
+)
+def test_async_analysis_hashes_and_caches_off_the_event_loop(
+    monkeypatch, mock_async_http, analyze
+) -> None:
+    threads: dict[str, threading.Thread] = {}
+
+    def record(name: str, func):
+        def wrapper(*args):
+            threads[name] = threading.current_thread()
+            return func(*args)
+
+        return wrapper
+
+    for name in ("image_bytes_cache_key", "get_vision_cache", "set_vision_cache"):
+        monkeypatch.setattr(vision, name, record(name, getattr(vision, name)))
+    # One reply body that satisfies both the single and the batch parser.
+    items = [{"label": "Egg", "confidence": 0.9, "notes": ""}]
+    reply = json.dumps({"items": items, "images": [{"index": 0, "items": items}]})
+    mock_async_http(lambda request: httpx.Response(200, json=_gemini_text_body(reply)))
+
+    asyncio.run(analyze([(b"egg", "image/png")]))
+
+    assert set(threads) == {"image_bytes_cache_key", "get_vision_cache", "set_vision_cache"}
+    assert threading.main_thread() not in threads.values()
+
+
+@pytest.fixture
+def sleeps(monkeypatch) -> list[float]:
+    delays: list[float] = []
+
+    async def fake_async_sleep(delay: float) -> None:
+        delays.append(delay)
+
+    monkeypatch.setattr(vision.time, "sleep", delays.append)
+    monkeypatch.setattr(vision.asyncio, "sleep", fake_async_sleep)
+    # Midpoint of the jitter range, so the expected delays stay exact.
+    monkeypatch.setattr(vision.random, "uniform", lambda low, high: (low + high) / 2)
+    return delays
+
+
+def _backoff_config(max_retries: int = 5) -> VisionConfig:
+    return VisionConfig(
+        api_key="test-key", model="test-model", max_retries=max_retries, retry_cap=5.0
+    )
+
+
+def _post(config: VisionConfig) -> httpx.Response:
+    return vision.post_with_backoff(
+        vision.get_http_client(), "https://vision.test", json={}, headers={}, config=config
+    )
+
+
+def _counting(calls: list[httpx.Request], *responses):
+    # Replays the given responses (or raises the given exceptions), repeating the last.
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        response = responses[min(len(calls), len(responses)) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    return handler
+
+
+def test_post_with_backoff_grows_delays_exponentially_up_to_the_cap(mock_http, sleeps) -> None:
+    calls: list[httpx.Request] = []
+    mock_http(_counting(calls, httpx.Response(503)))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _post(_backoff_config())
+
+    assert len(calls) == 5
+    assert sleeps == [1.5, 2.5, 4.5, 5.0]
+
+
+@pytest.mark.parametrize("max_retries", [1, 2, 4])
+def test_post_with_backoff_makes_max_retries_attempts(mock_http, sleeps, max_retries) -> None:
+    calls: list[httpx.Request] = []
+    mock_http(_counting(calls, httpx.Response(429)))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _post(_backoff_config(max_retries))
+
+    assert len(calls) == max_retries
+    assert len(sleeps) == max_retries - 1
+
+
+def test_post_with_backoff_caps_retry_after(mock_http, sleeps) -> None:
+    calls: list[httpx.Request] = []
+    mock_http(
+        _counting(calls, httpx.Response(429, headers={"Retry-After": "100"}), httpx.Response(200))
+    )
+
+    assert _post(_backoff_config()).status_code == 200
+    assert sleeps == [5.0]
+
+
+def test_post_with_backoff_retries_transport_errors(mock_http, sleeps) -> None:
+    calls: list[httpx.Request] = []
+    mock_http(_counting(calls, httpx.ConnectError("refused"), httpx.Response(200)))
+
+    assert _post(_backoff_config()).status_code == 200
+    assert len(calls) == 2
+    assert sleeps == [1.5]
+
+
+def test_post_with_backoff_reraises_transport_error_on_final_attempt(mock_http, sleeps) -> None:
+    calls: list[httpx.Request] = []
+    mock_http(_counting(calls, httpx.ConnectError("refused")))
+
+    with pytest.raises(httpx.ConnectError):
+        _post(_backoff_config(max_retries=3))
+
+    assert len(calls) == 3
+    assert sleeps == [1.5, 2.5]
+
+
+def test_post_with_backoff_raises_client_errors_at_once(mock_http, sleeps) -> None:
+    calls: list[httpx.Request] = []
+    mock_http(_counting(calls, httpx.Response(400), httpx.Response(200)))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _post(_backoff_config())
+
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+def test_post_with_backoff_async_uses_the_same_schedule(mock_async_http, sleeps) -> None:
+    calls: list[httpx.Request] = []
+    mock_async_http(
+        _counting(calls, httpx.ConnectError("refused"), httpx.Response(503), httpx.Response(200))
+    )
+
+    async def run() -> httpx.Response:
+        return await vision.post_with_backoff_async(
+            vision.get_async_http_client(),
+            "https://vision.test",
+            json={},
+            headers={},
+            config=_backoff_config(),
+        )
+
+    assert asyncio.run(run()).status_code == 200
+    assert len(calls) == 3
+    assert sleeps == [1.5, 2.5]
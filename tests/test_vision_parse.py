@@ -3,6 +3,7 @@ import pytest
 from macrocam.vision import (
     _extract_text_from_gemini_response,
     normalize_candidates,
+    parse_vision_json,
     parse_vision_json_with_retry,
 )
 
@@ -14,6 +15,23 @@ def test_parse_vision_json_with_retry() -> None:
     assert parsed["items"][0]["label"] == "Salad"
 
 
+@pytest.mark.parametrize(
+    "text",
+    [
+        '```json\n{"items": []}\n```',
+        '```\n{"items": []}\n```',
+        'Here you go: {"items": []} Enjoy!',
+    ],
+)
+def test_parse_vision_json_unwraps_fenced_json(text: str) -> None:
+    assert parse_vision_json(text) == {"items": []}
+
+
+def test_parse_vision_json_rejects_prose() -> None:
+    with pytest.raises(ValueError):
+        parse_vision_json("```json\nno foods here\n```")
+
+
 def test_normalize_candidates_clamps_and_pads() -> None:
     raw = {"items": [{"label": "  ", "confidence": 1.5, "notes": "test"}]}
     result = normalize_candidates(raw)
@@ -22,6 +40,42 @@ def test_normalize_candidates_clamps_and_pads() -> None:
     assert result.items[0].confidence == 1.0
 
 
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [
+        (0.4, 0.4),
+        (-2, 0.0),
+        (True, 1.0),
+        ("0.25", 0.25),
+        ("high", 0.0),
+        (None, 0.0),
+        (float("nan"), 0.0),
+        ("inf", 1.0),
+    ],
+)
+def test_normalize_candidates_confidence_values(raw: object, expected: float) -> None:
+    result = normalize_candidates({"items": [{"label": "Rice", "confidence": raw}]})
+    assert result.items[0].confidence == expected
+
+
+def test_normalize_candidates_pads_when_no_valid_items() -> None:
+    result = normalize_candidates({"items": ["rice", 3, None]})
+    assert [(item.label, item.confidence) for item in result.items] == [("Unknown", 0.01)] * 3
+
+
+def test_normalize_candidates_keeps_top_five_in_order() -> None:
+    items = [{"label": f"Food {index}", "confidence": index / 10} for index in range(10)]
+    items.append({"label": "Tie", "confidence": 0.9})
+    result = normalize_candidates({"items": items})
+    assert [item.label for item in result.items] == [
+        "Food 9",
+        "Tie",
+        "Food 8",
+        "Food 7",
+        "Food 6",
+    ]
+
+
 def test_extract_text_from_gemini_response() -> None:
     payload = {
         "candidates": [
@@ -40,6 +94,11 @@ def test_extract_text_from_gemini_response() -> None:
     assert _extract_text_from_gemini_response(payload).startswith("{")
 
 
+def test_extract_text_from_gemini_response_joins_multiple_parts() -> None:
+    payload = {"candidates": [{"content": {"parts": [{"text": " {"}, {"text": "} "}]}}]}
+    assert _extract_text_from_gemini_response(payload) == "{\n}"
+
+
 def test_extract_text_from_gemini_response_missing_text() -> None:
     payload = {"candidates": [{"content": {"parts": [{"foo": "bar"}]}}]}
     with pytest.raises(ValueError):